@@ -23,17 +23,25 @@ scraper = TrainInfoScraper()
 # 更新間隔（秒）: 5分 = 300秒
 UPDATE_INTERVAL = 300
 
+# キャッシュが空の場合の更新を1回にまとめるためのロック
+cold_start_lock = threading.Lock()
 
-def update_train_info():
-    """定期的に列車運行情報を更新"""
+
+def refresh_train_info():
+    """列車運行情報を取得してキャッシュを更新"""
     global train_info_cache, last_update_time
     
+    result = scraper.get_all_train_info()
+    train_info_cache = result
+    last_update_time = datetime.now()
+
+
+def update_train_info():
+    """定期的に列車運行情報を更新"""
     while True:
         try:
             print(f"[{datetime.now()}] 運行情報を更新中...")
-            result = scraper.get_all_train_info()
-            train_info_cache = result
-            last_update_time = datetime.now()
+            refresh_train_info()
             print(f"[{datetime.now()}] 更新完了")
         except Exception as e:
             print(f"更新エラー: {e}")
@@ -75,27 +83,14 @@ def keep_alive():
 @app.route('/api/train-info', methods=['GET'])
 def get_train_info():
     """列車運行情報を取得するエンドポイント"""
-    global train_info_cache, last_update_time
-    
-    # 初回または古い場合は即座に更新
+    # 初回は即座に更新（同時に来たリクエストは最初の更新の完了を待つ）
     if not train_info_cache or not last_update_time:
-        train_info_cache = scraper.get_all_train_info()
-        last_update_time = datetime.now()
+        with cold_start_lock:
+            if not train_info_cache or not last_update_time:
+                refresh_train_info()
     
-    # 路線の表示順序を定義
-    line_order = [
-        ('JR西日本', '奈良線'),
-        ('JR西日本', '京都線'),
-        ('JR西日本', '琵琶湖線'),
-        ('JR西日本', '湖西線'),
-        ('JR西日本', '嵯峨野線'),
-        ('JR西日本', '学研都市線'),
-        ('京阪電車', '本線'),
-        ('阪急電車', '京都線'),
-        ('近畿日本鉄道', '京都線'),
-        ('京都市営地下鉄', '烏丸線'),
-        ('京都市営地下鉄', '東西線')
-    ]
+    # 路線の表示順序（lines.json の登録順）
+    line_order = {key: i for i, key in enumerate(scraper.registry.display_order())}
     
     # データを指定された順序でソート
     data = train_info_cache.get('data', [])
@@ -104,11 +99,8 @@ def get_train_info():
         """ソートキーを取得"""
         company = item.get('company', '')
         line = item.get('line', '')
-        try:
-            return line_order.index((company, line))
-        except ValueError:
-            # リストに無い場合は最後に配置
-            return len(line_order)
+        # リストに無い場合は最後に配置
+        return line_order.get((company, line), len(line_order))
     
     sorted_data = sorted(data, key=get_sort_key)
     
@@ -132,6 +124,14 @@ def health_check():
     })
 
 
+# メモリ計測（MEMORY_TRACKING）を有効にした場合のみ公開
+if scraper.memory.enabled:
+    @app.route('/debug/memory', methods=['GET'])
+    def debug_memory():
+        """メモリ使用量レポート（更新処理のピーク値・取得元ごとの内訳）"""
+        return jsonify(scraper.memory.report())
+
+
 @app.route('/', methods=['GET'])
 def index():
     """ルートエンドポイント"""
@@ -159,8 +159,7 @@ if __name__ == '__main__':
     
     # 初回データ取得
     print("初回データ取得中...")
-    train_info_cache = scraper.get_all_train_info()
-    last_update_time = datetime.now()
+    refresh_train_info()
     print("初回データ取得完了")
     
     # Flaskサーバーを起動
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+取得スケジューラー: ホストごとのアクセス制限付き並列取得
+- ホストごとにトークンバケットでリクエスト頻度を制限
+- ホストごとに同時接続数の上限を設定
+- ホスト間は並列に取得するため、更新時間は最も取得ページ数の多いホストで決まる
+
+更新時間の目安は「ホストごとのページ数 / rate」の最大値。
+JR西日本・阪急のように1ページに複数路線が載っている取得元は路線を増やしてもページ数は増えないが、
+Yahoo!路線情報は1路線1ページ（/diainfo/{code}/0）のため、路線数に比例して更新時間が伸びる
+（例: Yahoo!の路線が300本、rate 2.0 の場合は約150秒）。
+"""
+
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import urlparse
+
+
+class TokenBucket:
+    """トークンバケット: 平均 rate 回/秒、最大 burst 回まで連続でリクエスト可能"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """トークンを1つ取得（足りない場合は補充まで待機）"""
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class FetchScheduler:
+    """ホストごとのレート制限・同時接続数制限付きでジョブを実行"""
+
+    def __init__(self, limits_for_host: Callable[[str], Dict]):
+        self._limits_for_host = limits_for_host
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def host_of(url: str) -> str:
+        return urlparse(url).hostname or ''
+
+    def _bucket(self, host: str) -> TokenBucket:
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                limits = self._limits_for_host(host)
+                bucket = self._buckets[host] = TokenBucket(
+                    float(limits.get('rate', 1.0)), int(limits.get('burst', 1))
+                )
+            return bucket
+
+    def throttle(self, url: str):
+        """リクエスト前に呼び出す: ホストのレート制限に従って待機"""
+        self._bucket(self.host_of(url)).acquire()
+
+    def run(self, jobs: List[Dict], func: Callable[[Dict], Any]) -> List[Optional[Any]]:
+        """ジョブ（'url' を持つdict）を実行し、ジョブと同じ順番で結果を返す
+
+        ホストごとに同時接続数の上限だけワーカースレッドを起動する。
+        例外が発生したジョブの結果は None。
+        """
+        results: List[Optional[Any]] = [None] * len(jobs)
+
+        by_host: Dict[str, List[int]] = {}
+        for index, job in enumerate(jobs):
+            by_host.setdefault(self.host_of(job['url']), []).append(index)
+
+        def worker(host: str, pending: 'queue.Queue[int]'):
+            while True:
+                try:
+                    index = pending.get_nowait()
+                except queue.Empty:
+                    return
+                try:
+                    results[index] = func(jobs[index])
+                except Exception as e:
+                    print(f"取得エラー ({jobs[index]['url']}): {e}")
+
+        threads = []
+        for host, indexes in by_host.items():
+            pending: 'queue.Queue[int]' = queue.Queue()
+            for index in indexes:
+                pending.put(index)
+            concurrency = max(1, int(self._limits_for_host(host).get('concurrency', 1)))
+            for _ in range(min(concurrency, len(indexes))):
+                thread = threading.Thread(target=worker, args=(host, pending), daemon=True)
+                thread.start()
+                threads.append(thread)
+
+        for thread in threads:
+            thread.join()
+        return results
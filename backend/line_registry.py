@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+監視対象路線の登録情報（lines.json）
+- 路線の追加は lines.json に1行追加するだけ（取得処理の追加は不要）
+- 同じページから取得する路線はまとめて1回だけ取得
+  （Yahoo!路線情報は1路線1ページのため、路線ごとに1回取得）
+- ホストごとのアクセス制限（レート・同時接続数）もここで設定
+
+lines.json の形式:
+    sources: 取得元の種類ごとのURLテンプレートと文字コード
+    hosts:   ホストごとのアクセス制限（default は未設定ホスト用）
+    lines:   路線一覧（記載順が表示順）
+        company, line: 会社名・路線名
+        source:        取得元の種類（jr_west / yahoo / hankyu）
+        code, area等:  URLテンプレートに埋め込む値
+        patterns:      ページ内で路線を探すための文字列（省略時は路線名）
+        display:       false の場合は結果に含めない（JR西日本の影響線区チェック用）
+
+環境変数:
+    LINES_CONFIG   設定ファイルのパス（デフォルト: このファイルと同じディレクトリの lines.json）
+"""
+
+import json
+import os
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'lines.json')
+
+
+class LineRegistry:
+    """路線の登録情報と、取得ページ単位へのグループ化"""
+
+    def __init__(self, config: Dict):
+        self.sources: Dict[str, Dict] = config.get('sources', {})
+        self.hosts: Dict[str, Dict] = config.get('hosts', {})
+        self.lines: List[Dict] = []
+
+        seen = set()
+        for entry in config.get('lines', []):
+            line = dict(entry)
+            key = (line['company'], line['line'])
+            if key in seen:
+                raise ValueError(f"路線が重複しています: {key[0]} {key[1]}")
+            if line.get('source') not in self.sources:
+                raise ValueError(f"未対応の取得元です: {line.get('source')}（{key[0]} {key[1]}）")
+            seen.add(key)
+            line.setdefault('patterns', [line['line']])
+            line.setdefault('display', True)
+            line['url'] = self._build_url(line)
+            self.lines.append(line)
+
+    @classmethod
+    def load(cls, path: Optional[str] = None) -> 'LineRegistry':
+        """設定ファイルから読み込み"""
+        path = path or os.environ.get('LINES_CONFIG', DEFAULT_CONFIG_PATH)
+        with open(path, encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def _build_url(self, line: Dict) -> str:
+        source = self.sources[line['source']]
+        params = {**source.get('defaults', {}), **line}
+        return source['url'].format(**params)
+
+    @property
+    def display_lines(self) -> List[Dict]:
+        """結果に含める路線（表示順）"""
+        return [line for line in self.lines if line['display']]
+
+    def display_order(self) -> List[Tuple[str, str]]:
+        """表示順の (会社名, 路線名) 一覧"""
+        return [(line['company'], line['line']) for line in self.display_lines]
+
+    def pages(self) -> List[Dict]:
+        """取得するページの一覧（同じURLの路線は1ページにまとめる）
+
+        表示対象の路線を含まないページは取得しない。
+        """
+        pages: Dict[str, Dict] = {}
+        for line in self.lines:
+            page = pages.get(line['url'])
+            if page is None:
+                page = pages[line['url']] = {
+                    'url': line['url'],
+                    'source': line['source'],
+                    'encoding': self.sources[line['source']].get('encoding', 'utf-8'),
+                    'lines': []
+                }
+            page['lines'].append(line)
+        return [page for page in pages.values() if any(line['display'] for line in page['lines'])]
+
+    def host_limits(self, host: str) -> Dict:
+        """ホストごとのアクセス制限（未設定の場合は default）"""
+        return self.hosts.get(host) or self.hosts.get('default', {})
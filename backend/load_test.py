@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+負荷試験ツール: APIサーバー / 統合Webサーバーの処理能力を計測
+- 計測対象のサーバーは別プロセスで起動（load_test_server.py、スクレイパーはスタブ）
+- 同時接続数・リクエスト比率を指定して /api/train-info, /api/health, 静的ファイルを取得
+- スループット、p50/p95/p99レイテンシ、エラー率を表示
+- 開発サーバー（app.run相当）と本番用WSGIサーバー（waitress）を比較
+- --url で起動済みのサーバー（gunicorn等や本番環境）も計測可能
+
+使い方:
+    python load_test.py                                  # APIサーバー（開発サーバー）
+    python load_test.py --server dev,waitress            # 開発サーバーとwaitressを比較
+    python load_test.py --target integrated              # 統合Webサーバー経由（静的ファイル含む）
+    python load_test.py --concurrency 1,8,32 --duration 20
+    python load_test.py --mix train-info=8,health=1,static=1 --json result.json
+    python load_test.py --url http://127.0.0.1:8080      # 起動済みのサーバーを計測
+
+waitressを使う場合は別途 `pip install waitress` が必要です。
+負荷をかける側は標準ライブラリのみで動作するため、別のマシンから --url で計測することもできます。
+"""
+
+import argparse
+import http.client
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+SERVER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'load_test_server.py')
+
+# 静的ファイルとして取得するパス（Flutter Web起動時に読み込まれるもの）
+STATIC_PATHS = [
+    '/index.html',
+    '/flutter_bootstrap.js',
+    '/manifest.json',
+    '/favicon.png',
+]
+
+# リクエスト種別 → パス
+REQUEST_KINDS = {
+    'train-info': ['/api/train-info'],
+    'health': ['/api/health'],
+    'static': STATIC_PATHS,
+}
+
+DEFAULT_MIX = {
+    'api': 'train-info=9,health=1',
+    'integrated': 'train-info=6,health=1,static=3',
+}
+
+
+class ServerProcess:
+    """別プロセスで動作している計測対象のサーバー"""
+
+    def __init__(self, name: str, args: List[str], startup_timeout: float = 30.0):
+        self.name = name
+        self.process = subprocess.Popen(
+            [sys.executable, SERVER_SCRIPT] + args,
+            stdout=subprocess.PIPE,
+            text=True
+        )
+        self.port = self._wait_for_port(startup_timeout)
+
+    def _wait_for_port(self, timeout: float) -> int:
+        """起動完了（"LISTENING <ポート>" の出力）を待つ"""
+        result = {}
+
+        def read():
+            for line in self.process.stdout:
+                if line.startswith('LISTENING '):
+                    result['port'] = int(line.split()[1])
+                    return
+
+        reader = threading.Thread(target=read, daemon=True)
+        reader.start()
+        reader.join(timeout)
+        if 'port' not in result:
+            self.stop()
+            raise SystemExit(f"サーバーの起動に失敗しました: {self.name}")
+        return result['port']
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def stop(self):
+        if self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+
+
+def parse_mix(text: str) -> List[Tuple[str, int]]:
+    """'train-info=8,health=1' 形式のリクエスト比率を解析"""
+    mix = []
+    for part in text.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        kind, _, weight = part.partition('=')
+        kind = kind.strip()
+        if kind not in REQUEST_KINDS:
+            raise SystemExit(f"未対応のリクエスト種別です: {kind}（{', '.join(REQUEST_KINDS)}）")
+        try:
+            value = int(weight) if weight else 1
+        except ValueError:
+            raise SystemExit(f"比率は整数で指定してください: {part}")
+        if value > 0:
+            mix.append((kind, value))
+    if not mix:
+        raise SystemExit("リクエスト比率が空です")
+    return mix
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """ソート済みリストのパーセンタイル（nearest-rank法）"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(p / 100.0 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class LoadResult:
+    """1回の負荷試験の集計結果"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+        self.error_samples: List[str] = []
+        self.elapsed = 0.0
+        self._lock = threading.Lock()
+
+    def merge(self, latencies: Dict[str, List[float]], errors: Dict[str, int], samples: List[str]):
+        with self._lock:
+            for kind, values in latencies.items():
+                self.latencies.setdefault(kind, []).extend(values)
+            for kind, count in errors.items():
+                self.errors[kind] = self.errors.get(kind, 0) + count
+            if len(self.error_samples) < 5:
+                self.error_samples.extend(samples[:5 - len(self.error_samples)])
+
+    def summary(self, kind: Optional[str] = None) -> Dict:
+        if kind is None:
+            values = sorted(v for vs in self.latencies.values() for v in vs)
+            errors = sum(self.errors.values())
+        else:
+            values = sorted(self.latencies.get(kind, []))
+            errors = self.errors.get(kind, 0)
+        total = len(values)
+        return {
+            'requests': total,
+            'errors': errors,
+            'error_rate': errors / total if total else 0.0,
+            'throughput': total / self.elapsed if self.elapsed else 0.0,
+            'p50_ms': percentile(values, 50) * 1000,
+            'p95_ms': percentile(values, 95) * 1000,
+            'p99_ms': percentile(values, 99) * 1000,
+        }
+
+
+def run_load(base_url: str, mix: List[Tuple[str, int]], concurrency: int,
+             duration: float, timeout: float, seed: int) -> LoadResult:
+    """指定した同時接続数で duration 秒間リクエストを送り続ける"""
+    kinds = [kind for kind, _ in mix]
+    weights = [weight for _, weight in mix]
+    result = LoadResult()
+    start_event = threading.Event()
+    deadline_holder = {}
+
+    target = urlparse(base_url)
+    connection_class = http.client.HTTPSConnection if target.scheme == 'https' else http.client.HTTPConnection
+    prefix = target.path.rstrip('/')
+
+    def worker(index: int):
+        rng = random.Random(seed + index)
+        latencies: Dict[str, List[float]] = {}
+        errors: Dict[str, int] = {}
+        samples: List[str] = []
+        # 接続はワーカーごとに再利用（サーバーが切断した場合のみ再接続）
+        conn: Optional[http.client.HTTPConnection] = None
+        start_event.wait()
+        deadline = deadline_holder['deadline']
+
+        while time.perf_counter() < deadline:
+            kind = rng.choices(kinds, weights)[0]
+            path = rng.choice(REQUEST_KINDS[kind])
+            started = time.perf_counter()
+            ok = False
+            try:
+                if conn is None:
+                    conn = connection_class(target.netloc, timeout=timeout)
+                conn.request('GET', prefix + path)
+                response = conn.getresponse()
+                response.read()
+                ok = 200 <= response.status < 300
+                if not ok:
+                    samples.append(f"{path}: HTTP {response.status}")
+                if response.will_close:
+                    conn.close()
+                    conn = None
+            except Exception as e:
+                samples.append(f"{path}: {e}")
+                if conn is not None:
+                    conn.close()
+                    conn = None
+            latencies.setdefault(kind, []).append(time.perf_counter() - started)
+            if not ok:
+                errors[kind] = errors.get(kind, 0) + 1
+
+        if conn is not None:
+            conn.close()
+        result.merge(latencies, errors, samples)
+
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+
+    started = time.perf_counter()
+    deadline_holder['deadline'] = started + duration
+    start_event.set()
+    for thread in threads:
+        thread.join()
+    result.elapsed = time.perf_counter() - started
+    return result
+
+
+def print_result(label: str, concurrency: int, result: LoadResult, kinds: List[str]):
+    """1回分の結果を表形式で表示"""
+    print(f"\n=== {label} / 同時接続数 {concurrency} ({result.elapsed:.1f}秒) ===")
+    print(f"{'種別':<12}{'件数':>8}{'req/s':>10}{'p50(ms)':>10}{'p95(ms)':>10}{'p99(ms)':>10}{'エラー率':>10}")
+    for kind in kinds + [None]:
+        s = result.summary(kind)
+        name = kind or '合計'
+        print(f"{name:<12}{s['requests']:>8}{s['throughput']:>10.1f}{s['p50_ms']:>10.1f}"
+              f"{s['p95_ms']:>10.1f}{s['p99_ms']:>10.1f}{s['error_rate'] * 100:>9.1f}%")
+    for sample in result.error_samples:
+        print(f"  エラー例: {sample}")
+
+
+def print_comparison(rows: List[Dict]):
+    """サーバー種別・同時接続数ごとの比較表を表示"""
+    print("\n=== 比較 ===")
+    print(f"{'サーバー':<20}{'同時接続':>8}{'req/s':>10}{'p50(ms)':>10}{'p95(ms)':>10}{'p99(ms)':>10}{'エラー率':>10}")
+    for row in rows:
+        s = row['total']
+        print(f"{row['server']:<20}{row['concurrency']:>8}{s['throughput']:>10.1f}{s['p50_ms']:>10.1f}"
+              f"{s['p95_ms']:>10.1f}{s['p99_ms']:>10.1f}{s['error_rate'] * 100:>9.1f}%")
+
+
+def start_servers(target: str, server: str, threads: int, web_dir: Optional[str]) -> List[ServerProcess]:
+    """計測対象のサーバーを別プロセスで起動（先頭がリクエスト先）"""
+    backend = ServerProcess(server, ['api', '--server', server, '--threads', str(threads)])
+    if target != 'integrated':
+        return [backend]
+    try:
+        front_args = ['integrated', '--backend-url', backend.base_url]
+        if web_dir:
+            front_args += ['--web-dir', web_dir]
+        front = ServerProcess(f"integrated+{server}", front_args)
+    except BaseException:
+        backend.stop()
+        raise
+    return [front, backend]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='APIサーバー / 統合Webサーバーの負荷試験')
+    parser.add_argument('--target', choices=['api', 'integrated'], default='api',
+                        help='api: Flask APIサーバーを直接 / integrated: 統合Webサーバー経由')
+    parser.add_argument('--server', default='dev',
+                        help='APIサーバーの種別（カンマ区切りで複数指定すると比較）: dev, waitress')
+    parser.add_argument('--url', default=None,
+                        help='起動済みサーバーのURL（指定時はサーバーを起動せずに計測）')
+    parser.add_argument('--concurrency', default='1,8,32',
+                        help='同時接続数（カンマ区切りで複数指定可）')
+    parser.add_argument('--duration', type=float, default=10.0, help='1回あたりの計測時間（秒）')
+    parser.add_argument('--warmup', type=float, default=1.0, help='計測前のウォームアップ時間（秒）')
+    parser.add_argument('--mix', default=None,
+                        help='リクエスト比率 例: train-info=8,health=1,static=1')
+    parser.add_argument('--timeout', type=float, default=10.0, help='リクエストのタイムアウト（秒）')
+    parser.add_argument('--threads', type=int, default=8, help='waitressのワーカースレッド数')
+    parser.add_argument('--web-dir', default=None, help='統合Webサーバーが提供するディレクトリ（デフォルト: build/web）')
+    parser.add_argument('--seed', type=int, default=0, help='リクエスト選択の乱数シード')
+    parser.add_argument('--json', dest='json_path', default=None, help='結果をJSONファイルに保存')
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix or DEFAULT_MIX[args.target])
+    kinds = [kind for kind, _ in mix]
+    if args.target == 'api' and 'static' in kinds:
+        raise SystemExit("静的ファイルは統合Webサーバーのみが提供します（--target integrated を指定）")
+    concurrencies = [int(c) for c in args.concurrency.split(',') if c.strip()]
+    if args.url:
+        servers = [args.url]
+    else:
+        servers = [s.strip() for s in args.server.split(',') if s.strip()]
+    web_dir = os.path.abspath(args.web_dir) if args.web_dir else None
+
+    print(f"負荷試験: target={args.target} mix={args.mix or DEFAULT_MIX[args.target]}")
+
+    rows = []
+    for server in servers:
+        if args.url:
+            processes = []
+            name, base_url = args.url, args.url.rstrip('/')
+        else:
+            processes = start_servers(args.target, server, args.threads, web_dir)
+            name, base_url = processes[0].name, processes[0].base_url
+
+        try:
+            for concurrency in concurrencies:
+                if args.warmup > 0:
+                    run_load(base_url, mix, concurrency, args.warmup, args.timeout, args.seed)
+                result = run_load(base_url, mix, concurrency, args.duration, args.timeout, args.seed)
+                print_result(name, concurrency, result, kinds)
+                rows.append({
+                    'server': name,
+                    'concurrency': concurrency,
+                    'duration': result.elapsed,
+                    'total': result.summary(),
+                    'by_kind': {kind: result.summary(kind) for kind in kinds},
+                })
+        finally:
+            for process in processes:
+                process.stop()
+
+    print_comparison(rows)
+
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'target': args.target,
+                'mix': dict(mix),
+                'timestamp': datetime.now().isoformat(),
+                'results': rows
+            }, f, ensure_ascii=False, indent=2)
+        print(f"\n結果を保存しました: {args.json_path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+負荷試験用サーバー: スタブのスクレイパーでAPIサーバー / 統合Webサーバーを起動
+- load_test.py から別プロセスとして起動される（負荷をかける側とGILを共有しない）
+- 手動で起動して load_test.py --url で計測することも可能
+- 起動後、標準出力に "LISTENING <ポート番号>" を1行出力する
+
+使い方:
+    python load_test_server.py api --server dev --port 8080
+    python load_test_server.py api --server waitress --threads 8 --port 8080
+    python load_test_server.py integrated --backend-url http://127.0.0.1:8080 --port 5060
+"""
+
+import argparse
+import functools
+import logging
+import os
+import socketserver
+from datetime import datetime
+from typing import Dict
+
+# 統合Webサーバーが提供するFlutter Webのビルドディレクトリ
+DEFAULT_WEB_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'build', 'web')
+
+
+def _announce(port: int):
+    """親プロセスに待ち受けポートを通知"""
+    print(f"LISTENING {port}", flush=True)
+
+
+def install_stub_scraper():
+    """api_serverのスクレイパーをスタブに差し替え、キャッシュを初期化"""
+    import api_server
+    from train_scraper import TrainInfoScraper
+
+    class StubTrainInfoScraper(TrainInfoScraper):
+        """負荷試験用のスタブ: 外部サイトにアクセスせず、登録路線の固定データを返す"""
+
+        def get_all_train_info(self) -> Dict:
+            now = datetime.now().isoformat()
+            data = []
+            for i, (company, line) in enumerate(self.registry.display_order()):
+                # 実際のレスポンスに近い大きさになるよう、一部の路線は遅延ありにする
+                delayed = i % 4 == 1
+                data.append({
+                    'company': company,
+                    'line': line,
+                    'status': '遅延あり' if delayed else '平常運転',
+                    'delay_minutes': 20 if delayed else 0,
+                    'details': '【再開見込み: 18:30】 人身事故の影響で、列車に遅れが出ています。' if delayed else '',
+                    'updated_at': now
+                })
+            return {
+                'status': 'success',
+                'timestamp': now,
+                'data': data
+            }
+
+    stub = StubTrainInfoScraper()
+    api_server.scraper = stub
+    api_server.train_info_cache = stub.get_all_train_info()
+    api_server.last_update_time = datetime.now()
+    return api_server.app
+
+
+def serve_api(server: str, host: str, port: int, threads: int):
+    """FlaskアプリをWSGIサーバーで起動（ポート0の場合は空きポートを自動割り当て）"""
+    app = install_stub_scraper()
+    # リクエストごとのアクセスログ・キュー警告は計測の邪魔になるので抑制
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    logging.getLogger('waitress').setLevel(logging.ERROR)
+
+    if server == 'dev':
+        # app.run() と同じWerkzeug開発サーバー（スレッドモード）
+        from werkzeug.serving import make_server
+        httpd = make_server(host, port, app, threaded=True)
+        _announce(httpd.server_port)
+        httpd.serve_forever()
+        return
+
+    if server == 'waitress':
+        try:
+            from waitress import create_server
+        except ImportError:
+            raise SystemExit("waitressがインストールされていません: pip install waitress")
+        httpd = create_server(app, host=host, port=port, threads=threads)
+        _announce(httpd.effective_port)
+        httpd.run()
+        return
+
+    raise SystemExit(f"未対応のサーバー種別です: {server}")
+
+
+def serve_integrated(backend_url: str, host: str, port: int, web_dir: str):
+    """統合Webサーバーを起動し、APIプロキシ先を指定のバックエンドに向ける"""
+    import integrated_server
+
+    class QuietProxyHTTPRequestHandler(integrated_server.ProxyHTTPRequestHandler):
+        """アクセスログを出力しないハンドラー（標準エラーへの出力が計測の邪魔になるため）"""
+
+        def log_message(self, format, *args):
+            pass
+
+    integrated_server.BACKEND_API_URL = backend_url.rstrip('/')
+    handler = functools.partial(QuietProxyHTTPRequestHandler, directory=web_dir)
+    # 本番と同じ条件で計測するため、main() と同じくシングルスレッドのTCPServerを使用
+    with socketserver.TCPServer((host, port), handler) as httpd:
+        _announce(httpd.server_address[1])
+        httpd.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='負荷試験用サーバー（スタブのスクレイパーを使用）')
+    sub = parser.add_subparsers(dest='target', required=True)
+
+    api = sub.add_parser('api', help='Flask APIサーバー')
+    api.add_argument('--server', choices=['dev', 'waitress'], default='dev')
+    api.add_argument('--threads', type=int, default=8, help='waitressのワーカースレッド数')
+
+    integrated = sub.add_parser('integrated', help='統合Webサーバー（APIプロキシ + 静的ファイル）')
+    integrated.add_argument('--backend-url', required=True, help='プロキシ先のAPIサーバーのURL')
+    integrated.add_argument('--web-dir', default=DEFAULT_WEB_DIR, help='提供する静的ファイルのディレクトリ')
+
+    for p in (api, integrated):
+        p.add_argument('--host', default='127.0.0.1')
+        p.add_argument('--port', type=int, default=0, help='待ち受けポート（0: 空きポートを自動割り当て）')
+    args = parser.parse_args()
+
+    try:
+        if args.target == 'api':
+            serve_api(args.server, args.host, args.port, args.threads)
+        else:
+            serve_integrated(args.backend_url, args.host, args.port, os.path.abspath(args.web_dir))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
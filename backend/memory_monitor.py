@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+メモリ使用量の監視（無料プランの512MBインスタンス向け）
+- N回に1回の更新処理だけtracemallocで計測（更新処理が終わったら停止）
+- 取得元（ページ）ごとのピーク値とHTML解析木の大きさを記録
+- 解析中のHTML解析木の推定メモリが上限を超える場合は、空くまで次の解析を待たせる
+
+tracemallocは計測中のすべてのメモリ割り当てを記録するため、計測中の更新処理は
+メモリ使用量が約2倍、HTML解析の時間が数倍になる。本番では無効のままにするか、
+大きめの間隔で有効にすること。
+
+環境変数:
+    MEMORY_TRACKING          N回に1回の更新処理を計測（0: 無効、1: 毎回、デフォルト: 0）
+    MEMORY_PARSE_BUDGET_MB   同時に解析中のHTML解析木の推定メモリの上限（MB）
+                             超える場合は解析を待たせる（0で無効、デフォルト: 128）
+"""
+
+import os
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Optional
+
+MB = 1024 * 1024
+
+# HTML解析木のメモリ使用量の推定倍率（html.parserの解析木はおおむね元のHTMLの10倍程度）
+# 計測を有効にすると /debug/memory の content_mb と tree_mb から実際の倍率を確認できる
+PARSE_MEMORY_FACTOR = 10
+
+
+def _to_mb(value: Optional[int]) -> Optional[float]:
+    return round(value / MB, 2) if value is not None else None
+
+
+class MemoryMonitor:
+    """更新処理のメモリ使用量を計測し、解析中の推定メモリを上限内に抑える"""
+
+    def __init__(self, sample_every: Optional[int] = None, parse_budget_mb: Optional[int] = None):
+        if sample_every is None:
+            sample_every = int(os.environ.get('MEMORY_TRACKING', 0))
+        if parse_budget_mb is None:
+            parse_budget_mb = int(os.environ.get('MEMORY_PARSE_BUDGET_MB', 128))
+        self.sample_every = max(0, sample_every)
+        self.parse_budget_bytes = parse_budget_mb * MB if parse_budget_mb > 0 else 0
+
+        self._lock = threading.Lock()
+        self._parse_cond = threading.Condition()
+        self._parsing_bytes = 0
+        self._parsing_count = 0
+        self._refresh_count = 0
+        # 計測中の更新処理の数（最後の更新処理が終わったらtracemallocを停止）
+        self._tracing_refs = 0
+        self._last_refresh: Optional[Dict] = None
+        self._last_traced_refresh: Optional[Dict] = None
+        self._max_refresh_peak = 0
+        self._source_max: Dict[str, Dict[str, int]] = {}
+        self._waited_parses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.sample_every > 0
+
+    def traced_bytes(self, refresh: Optional[Dict] = None) -> int:
+        """tracemallocで追跡中のメモリ使用量（計測していない更新処理では0）"""
+        if refresh is not None and not refresh['traced']:
+            return 0
+        return tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else 0
+
+    def rss_bytes(self) -> Optional[int]:
+        """プロセスの現在の常駐メモリ（Linuxのみ）"""
+        try:
+            with open('/proc/self/statm') as f:
+                resident_pages = int(f.read().split()[1])
+            return resident_pages * os.sysconf('SC_PAGE_SIZE')
+        except (OSError, ValueError, IndexError):
+            return None
+
+    def begin_refresh(self) -> Dict:
+        """更新処理の開始: 更新処理ごとの状態を返す（end_refresh に渡す）
+
+        計測対象の回であればtracemallocを開始する。他の更新処理の計測中に始まった
+        更新処理も計測対象になる（ピーク値は同時に実行中の更新処理の合計）。
+        """
+        with self._lock:
+            self._refresh_count += 1
+            sampled = self.enabled and (self._refresh_count - 1) % self.sample_every == 0
+            traced = False
+            if self._tracing_refs > 0:
+                traced = True
+            elif sampled and not tracemalloc.is_tracing():
+                # スタックは1フレームのみ保存（計測自体のメモリ消費を抑える）
+                tracemalloc.start(1)
+                traced = True
+            if traced:
+                self._tracing_refs += 1
+            return {
+                'started_at': datetime.now().isoformat(),
+                'traced': traced,
+                'sources': {}
+            }
+
+    def end_refresh(self, refresh: Dict):
+        """更新処理の終了: ピーク値を確定し、最後の計測中の更新処理であればtracemallocを停止"""
+        with self._lock:
+            peak = None
+            if refresh['traced']:
+                peak = tracemalloc.get_traced_memory()[1]
+                self._tracing_refs -= 1
+                if self._tracing_refs == 0:
+                    # 記録した割り当て情報を破棄し、計測のオーバーヘッドをなくす
+                    tracemalloc.stop()
+            refresh['finished_at'] = datetime.now().isoformat()
+            refresh['peak_bytes'] = peak
+            refresh['rss_bytes'] = self.rss_bytes()
+            self._last_refresh = refresh
+            if peak is not None:
+                self._last_traced_refresh = refresh
+                self._max_refresh_peak = max(self._max_refresh_peak, peak)
+
+    def sample(self, refresh: Optional[Dict], source: str,
+               tree_bytes: Optional[int] = None, content_bytes: Optional[int] = None):
+        """取得元ごとのメモリ使用量をサンプリング
+
+        他スレッドの割り当ても含まれるため、並列取得中の値は上限の目安として扱う。
+        """
+        if refresh is None or not refresh['traced']:
+            return
+        current = self.traced_bytes(refresh)
+        with self._lock:
+            stats = refresh['sources'].setdefault(source, {'peak_bytes': 0, 'tree_bytes': 0, 'content_bytes': 0})
+            stats['peak_bytes'] = max(stats['peak_bytes'], current)
+            if tree_bytes is not None:
+                stats['tree_bytes'] = max(stats['tree_bytes'], tree_bytes)
+            if content_bytes is not None:
+                stats['content_bytes'] = max(stats['content_bytes'], content_bytes)
+            overall = self._source_max.setdefault(source, {'peak_bytes': 0, 'tree_bytes': 0, 'content_bytes': 0})
+            for key in overall:
+                overall[key] = max(overall[key], stats[key])
+
+    @contextmanager
+    def parse_gate(self, content_bytes: int):
+        """解析中の推定メモリが上限を超える場合は、他の解析が終わるまで待つ
+
+        解析木を解放したら（ブロックを抜けたら）予約を戻すため、上限を超えていたのは
+        その時点で解析中だった分だけで、解析が終われば再び並列に実行される。
+        1件だけの解析は上限を超えていても実行する。
+        """
+        estimate = content_bytes * PARSE_MEMORY_FACTOR
+        with self._parse_cond:
+            if self.parse_budget_bytes:
+                waited = False
+                while self._parsing_count > 0 and self._parsing_bytes + estimate > self.parse_budget_bytes:
+                    waited = True
+                    self._parse_cond.wait()
+                if waited:
+                    self._waited_parses += 1
+            self._parsing_bytes += estimate
+            self._parsing_count += 1
+        try:
+            yield
+        finally:
+            with self._parse_cond:
+                self._parsing_bytes -= estimate
+                self._parsing_count -= 1
+                self._parse_cond.notify_all()
+
+    @staticmethod
+    def _sources_report(sources: Dict[str, Dict[str, int]]) -> Dict:
+        return {
+            name: {
+                'peak_mb': _to_mb(stats['peak_bytes']),
+                'tree_mb': _to_mb(stats['tree_bytes']),
+                'content_mb': _to_mb(stats['content_bytes'])
+            } for name, stats in sources.items()
+        }
+
+    @classmethod
+    def _refresh_report(cls, refresh: Optional[Dict]) -> Optional[Dict]:
+        if refresh is None:
+            return None
+        return {
+            'started_at': refresh['started_at'],
+            'finished_at': refresh['finished_at'],
+            'traced': refresh['traced'],
+            'peak_mb': _to_mb(refresh['peak_bytes']),
+            'rss_mb': _to_mb(refresh['rss_bytes']),
+            'sources': cls._sources_report(refresh['sources'])
+        }
+
+    def report(self) -> Dict:
+        """/debug/memory 用のレポート"""
+        with self._lock:
+            last_report = self._refresh_report(self._last_refresh)
+            last_traced_report = self._refresh_report(self._last_traced_refresh)
+            sources_max = self._sources_report(self._source_max)
+            max_refresh_peak = self._max_refresh_peak if self._last_traced_refresh else None
+        with self._parse_cond:
+            parsing_bytes = self._parsing_bytes
+            waited_parses = self._waited_parses
+
+        return {
+            'sample_every': self.sample_every,
+            'rss_mb': _to_mb(self.rss_bytes()),
+            'parse_budget_mb': _to_mb(self.parse_budget_bytes) if self.parse_budget_bytes else None,
+            'parsing_estimate_mb': _to_mb(parsing_bytes),
+            'waited_parses': waited_parses,
+            'max_refresh_peak_mb': _to_mb(max_refresh_peak),
+            'last_refresh': last_report,
+            'last_traced_refresh': last_traced_report,
+            'sources_max': sources_max
+        }
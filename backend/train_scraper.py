@@ -3,40 +3,65 @@
 """
 列車運行情報スクレイピングサーバー（強化版）
 - 全路線を各社公式サイト + Yahoo!路線情報のハイブリッド取得
-- 路線追加: JR学研都市線、京都市営地下鉄
-- 並列処理で高速化
+- 監視対象路線は lines.json で設定（路線追加に取得処理の追加は不要）
+- ホストごとのアクセス制限付き並列処理で高速化
 - エラーリトライ機能で信頼性向上
 - 運転再開見込み時刻の取得
+- JR西日本は前回から変化した事象（div.jisyo）だけを再抽出
+- メモリ使用量の計測と解析木の明示的な解放（/debug/memory）
 """
 
+import gc
+import hashlib
 import json
 import re
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Dict, List, Optional
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional, Tuple
 import requests
 from bs4 import BeautifulSoup
 import time
+from fetch_scheduler import FetchScheduler
+from line_registry import LineRegistry
+from memory_monitor import MemoryMonitor
+
+# 路線の識別キー: (会社名, 路線名)
+LineKey = Tuple[str, str]
 
 
 class TrainInfoScraper:
     """列車運行情報を取得するスクレイパー（強化版）"""
 
-    def __init__(self):
+    def __init__(self, registry: Optional[LineRegistry] = None):
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
         }
         self.session = requests.Session()
         self.session.headers.update(self.headers)
+        self.memory = MemoryMonitor()
+        self.registry = registry or LineRegistry.load()
+        self.scheduler = FetchScheduler(self.registry.host_limits)
+        # 取得元の種類ごとの抽出処理
+        self._extractors = {
+            'jr_west': self._extract_jr_west,
+            'yahoo': self._extract_yahoo,
+            'hankyu': self._extract_hankyu,
+        }
+        # JR西日本の事象ごとの抽出結果（ページ → フィンガープリント → 結果）
+        self._jr_incident_cache: Dict[Tuple[LineKey, ...], Dict[str, Dict]] = {}
+        for line in self.registry.lines:
+            if line['source'] not in self._extractors:
+                raise ValueError(f"抽出処理が未対応の取得元です: {line['source']}")
 
-    def _fetch_with_retry(self, url: str, encoding: str = 'utf-8', max_retries: int = 2) -> Optional[BeautifulSoup]:
+    def _fetch_with_retry(self, url: str, encoding: str = 'utf-8', max_retries: int = 2) -> Optional[bytes]:
         """リトライ機能付きHTTP取得"""
         for attempt in range(max_retries):
             try:
+                self.scheduler.throttle(url)
                 response = self.session.get(url, timeout=8)
                 response.encoding = encoding
                 response.raise_for_status()
-                return BeautifulSoup(response.content, 'html.parser')
+                return response.content
             except Exception as e:
                 if attempt < max_retries - 1:
                     time.sleep(0.5)  # 0.5秒待機してリトライ
@@ -45,74 +70,30 @@ class TrainInfoScraper:
                 return None
         return None
 
-    def _get_yahoo_line_info(self, line_code: str, line_name: str, company: str) -> Dict:
-        """Yahoo!路線情報から取得（ハイブリッド用）"""
-        url = f"https://transit.yahoo.co.jp/diainfo/{line_code}/0"
-        
-        try:
-            soup = self._fetch_with_retry(url)
-            if not soup:
-                raise Exception("ページ取得失敗")
-            
-            # 運行状況を取得
-            status_elem = soup.select_one('.trouble')
-            
-            if status_elem and '平常運転' not in status_elem.get_text():
-                # 遅延または運転見合わせ
-                title = status_elem.select_one('h3')
-                if title:
-                    status_text = title.get_text(strip=True)
-                    
-                    if '運転見合わせ' in status_text or '運休' in status_text:
-                        status = '運転見合わせ'
-                        delay_minutes = 0
-                    else:
-                        status = '遅延あり'
-                        # 遅延時間を抽出
-                        delay_match = re.search(r'(\d+)分', status_text)
-                        delay_minutes = int(delay_match.group(1)) if delay_match else 20
-                    
-                    # 詳細情報を取得
-                    detail_elem = status_elem.select_one('.trouble-detail')
-                    if detail_elem:
-                        details = detail_elem.get_text(strip=True)[:300]
-                    else:
-                        details = status_text
-                    
-                    # 運転再開見込み時刻を抽出
-                    resume_time = self._extract_resume_time(details)
-                    if resume_time:
-                        details = f"【再開見込み: {resume_time}】 {details}"
-                    
-                    return {
-                        'company': company,
-                        'line': line_name,
-                        'status': status,
-                        'delay_minutes': delay_minutes,
-                        'details': details,
-                        'updated_at': datetime.now().isoformat()
-                    }
-            
-            # 平常運転
-            return {
-                'company': company,
-                'line': line_name,
-                'status': '平常運転',
-                'delay_minutes': 0,
-                'details': '',
-                'updated_at': datetime.now().isoformat()
-            }
-            
-        except Exception as e:
-            print(f"Yahoo!路線情報取得エラー ({line_name}): {e}")
-            return {
-                'company': company,
-                'line': line_name,
-                'status': '情報取得エラー',
-                'delay_minutes': 0,
-                'details': '現在、情報を取得できません',
-                'updated_at': datetime.now().isoformat()
-            }
+    @contextmanager
+    def _fetch_soup(self, url: str, source: str, encoding: str = 'utf-8', refresh: Optional[Dict] = None):
+        """HTMLを取得して解析（ブロックを抜けると解析木を解放）
+
+        解析中の推定メモリが上限を超える場合は、他の解析木が解放されるまで解析を待つ。
+        """
+        content = self._fetch_with_retry(url, encoding=encoding)
+        if content is None:
+            yield None
+            return
+
+        content_bytes = len(content)
+        with self.memory.parse_gate(content_bytes):
+            before = self.memory.traced_bytes(refresh)
+            soup = BeautifulSoup(content, 'html.parser')
+            self.memory.sample(refresh, source, tree_bytes=self.memory.traced_bytes(refresh) - before,
+                               content_bytes=content_bytes)
+            del content
+            try:
+                yield soup
+            finally:
+                self.memory.sample(refresh, source)
+                # 要素間の参照を断ち切り、解析木の大部分をこの時点で解放
+                soup.decompose()
 
     def _extract_resume_time(self, text: str) -> Optional[str]:
         """運転再開見込み時刻を抽出"""
@@ -129,335 +110,303 @@ class TrainInfoScraper:
         
         return None
 
-    def get_keihan_info(self) -> List[Dict]:
-        """京阪電車の運行情報を取得（Yahoo!ハイブリッド）"""
-        # Yahoo!路線情報から取得（より正確）
-        return [self._get_yahoo_line_info('300', '本線', '京阪電車')]
-
-    def get_jr_west_info(self) -> List[Dict]:
-        """JR西日本の運行情報を取得（公式サイト + 学研都市線追加）"""
-        url = "https://trafficinfo.westjr.co.jp/kinki.html"
-        target_lines = {
-            "奈良線": ["奈良線"],
-            "京都線": ["京都線", "ＪＲ京都線"],
-            "琵琶湖線": ["琵琶湖線"],
-            "湖西線": ["湖西線"],
-            "嵯峨野線": ["嵯峨野線"],
-            "学研都市線": ["学研都市線", "片町線"]
+    def _line_result(self, line: Dict, status: str, delay_minutes: int = 0, details: str = '') -> Dict:
+        """路線ごとの結果を作成"""
+        return {
+            'company': line['company'],
+            'line': line['line'],
+            'status': status,
+            'delay_minutes': delay_minutes,
+            'details': details,
+            'updated_at': datetime.now().isoformat()
         }
-        
-        # 影響線区をチェックするための追加路線（結果には含めない）
-        # 各対象路線に影響を与える可能性のある路線をすべて含める
-        check_lines_for_impact = {
-            # 奈良線への影響
-            "大阪環状線": ["大阪環状線"],
-            "大和路線": ["大和路線"],
-            
-            # 京都線・琵琶湖線・湖西線への影響
-            "ＪＲ神戸線": ["ＪＲ神戸線", "神戸線"],
-            
-            # 学研都市線への影響
-            "おおさか東線": ["おおさか東線"],
-            
-            # その他の主要路線（相互に影響する可能性）
-            "阪和線": ["阪和線"],
-            "関西線": ["関西線"],
-            "ＪＲ東西線": ["ＪＲ東西線"],
-            "ＪＲゆめ咲線": ["ＪＲゆめ咲線"]
+
+    def _error_results(self, page: Dict) -> Dict[LineKey, Dict]:
+        """ページ取得に失敗した場合の結果（表示対象の路線すべて）"""
+        return {
+            (line['company'], line['line']): self._line_result(line, '情報取得エラー', details='現在、情報を取得できません')
+            for line in page['lines'] if line['display']
         }
-        
-        # 全チェック対象路線（target_lines + check_lines_for_impact）
-        all_check_lines = {**target_lines, **check_lines_for_impact}
+
+    def _get_page_info(self, page: Dict, refresh: Optional[Dict] = None) -> Dict[LineKey, Dict]:
+        """1ページを取得し、そのページに含まれる表示対象路線の運行情報を返す"""
+        extractor = self._extractors[page['source']]
         
         try:
-            soup = self._fetch_with_retry(url, encoding='shift_jis')
-            if not soup:
-                raise Exception("ページ取得失敗")
-            
-            results = []
-            found_lines = {}
-            
-            # 運行情報一覧を取得（HTMLの構造に合わせて修正）
-            # 方法1: ul.page_downを探す（従来の方法）
-            info_list = soup.find('ul', class_='page_down')
-            if not info_list:
-                # 方法2: すべてのulタグからli > aを含むものを探す
-                all_uls = soup.find_all('ul')
-                for ul in all_uls:
-                    if ul.find('li') and ul.find('a'):
-                        info_list = ul
-                        break
-            
-            if info_list:
-                items = info_list.find_all('li')
-                for item in items:
-                    link = item.find('a')
-                    if not link:
-                        continue
-                    
-                    text = link.get_text()
-                    link_id = link.get('href', '').replace('#', '')
-                    
-                    # 全チェック対象路線かチェック（target_lines + check_lines_for_impact）
-                    for line_name, line_patterns in all_check_lines.items():
-                        if any(pattern in text for pattern in line_patterns):
-                            # 詳細情報を取得
-                            detail_anchor = soup.find('a', {'name': link_id})
-                            if detail_anchor:
-                                parent_div = detail_anchor.find_parent('div', class_='jisyo')
-                                if parent_div:
-                                    detail_text = parent_div.get_text()
-                                    
-                                    # 運転見合わせの検出
-                                    if '運転見合わせ' in text or '運転見合わせ' in detail_text:
-                                        status = '運転見合わせ'
-                                        delay_minutes = 0
-                                    elif '遅延' in text or '遅れ' in detail_text:
-                                        status = '遅延あり'
-                                        delay_match = re.search(r'(\d+)分', detail_text)
-                                        delay_minutes = int(delay_match.group(1)) if delay_match else 20
-                                    else:
-                                        status = '遅延あり'
-                                        delay_minutes = 20
-                                    
-                                    # 詳細情報を抽出
-                                    gaiyo = parent_div.find('p', class_='gaiyo')
-                                    if gaiyo:
-                                        details = gaiyo.get_text().strip().replace('\n', ' ').replace('\r', '')[:300]
-                                    else:
-                                        details = text
-                                    
-                                    # 運転再開見込み時刻を抽出
-                                    resume_time = self._extract_resume_time(detail_text)
-                                    if resume_time:
-                                        details = f"【再開見込み: {resume_time}】 {details}"
-                                    
-                                    # 対象路線のみ登録（大阪環状線等のチェック用路線は除外）
-                                    if line_name in target_lines:
-                                        found_lines[line_name] = {
-                                            'company': 'JR西日本',
-                                            'line': line_name,
-                                            'status': status,
-                                            'delay_minutes': delay_minutes,
-                                            'details': details,
-                                            'updated_at': datetime.now().isoformat()
-                                        }
-                                    
-                                    # 【重要】影響線区を解析して、他の対象路線にも情報を設定
-                                    # 影響線区は <span class='line'> に記載されている
-                                    line_spans = parent_div.find_all('span', class_='line')
-                                    for line_span in line_spans:
-                                        line_text = line_span.get_text()
-                                        # 各対象路線をチェック（target_linesのみ）
-                                        for check_line_name, check_patterns in target_lines.items():
-                                            if check_line_name not in found_lines:  # まだ登録されていない路線
-                                                if any(pattern in line_text for pattern in check_patterns):
-                                                    # 影響を受けている路線として登録
-                                                    found_lines[check_line_name] = {
-                                                        'company': 'JR西日本',
-                                                        'line': check_line_name,
-                                                        'status': status,
-                                                        'delay_minutes': delay_minutes,
-                                                        'details': details,  # 同じ詳細情報を使用
-                                                        'updated_at': datetime.now().isoformat()
-                                                    }
-                                    break
-            
-            # 見つかった路線の情報を追加
-            for line_info in found_lines.values():
-                results.append(line_info)
+            with self._fetch_soup(page['url'], page['url'], encoding=page['encoding'], refresh=refresh) as soup:
+                if not soup:
+                    raise Exception("ページ取得失敗")
+                found = extractor(soup, page['lines'])
             
             # 情報がない路線は平常運転とする
-            for line_name in target_lines.keys():
-                if line_name not in found_lines:
-                    results.append({
-                        'company': 'JR西日本',
-                        'line': line_name,
-                        'status': '平常運転',
-                        'delay_minutes': 0,
-                        'details': '',
-                        'updated_at': datetime.now().isoformat()
-                    })
-            
+            results = {}
+            for line in page['lines']:
+                if not line['display']:
+                    continue
+                key = (line['company'], line['line'])
+                results[key] = found.get(key) or self._line_result(line, '平常運転')
             return results
             
         except Exception as e:
-            print(f"JR西日本の情報取得エラー: {e}")
-            return [{
-                'company': 'JR西日本',
-                'line': line,
-                'status': '情報取得エラー',
-                'delay_minutes': 0,
-                'details': '現在、情報を取得できません',
-                'updated_at': datetime.now().isoformat()
-            } for line in target_lines.keys()]
-
+            print(f"運行情報取得エラー ({page['url']}): {e}")
+            return self._error_results(page)
 
+    def _extract_yahoo(self, soup: BeautifulSoup, lines: List[Dict]) -> Dict[LineKey, Dict]:
+        """Yahoo!路線情報のページから抽出（1ページ1路線）"""
+        found = {}
+        
+        # 運行状況を取得
+        status_elem = soup.select_one('.trouble')
+        
+        if status_elem and '平常運転' not in status_elem.get_text():
+            # 遅延または運転見合わせ
+            title = status_elem.select_one('h3')
+            if title:
+                status_text = title.get_text(strip=True)
+                
+                if '運転見合わせ' in status_text or '運休' in status_text:
+                    status = '運転見合わせ'
+                    delay_minutes = 0
+                else:
+                    status = '遅延あり'
+                    # 遅延時間を抽出
+                    delay_match = re.search(r'(\d+)分', status_text)
+                    delay_minutes = int(delay_match.group(1)) if delay_match else 20
+                
+                # 詳細情報を取得
+                detail_elem = status_elem.select_one('.trouble-detail')
+                if detail_elem:
+                    details = detail_elem.get_text(strip=True)[:300]
+                else:
+                    details = status_text
+                
+                # 運転再開見込み時刻を抽出
+                resume_time = self._extract_resume_time(details)
+                if resume_time:
+                    details = f"【再開見込み: {resume_time}】 {details}"
+                
+                for line in lines:
+                    found[(line['company'], line['line'])] = self._line_result(line, status, delay_minutes, details)
+        
+        return found
 
-    def get_kintetsu_info(self) -> List[Dict]:
-        """近畿日本鉄道の運行情報を取得（Yahoo!ハイブリッド）"""
-        # Yahoo!路線情報から取得（より正確）
-        return [self._get_yahoo_line_info('288', '京都線', '近畿日本鉄道')]
+    def _extract_jr_west(self, soup: BeautifulSoup, lines: List[Dict]) -> Dict[LineKey, Dict]:
+        """JR西日本の公式サイトから抽出（影響線区も解析）
 
-    def get_hankyu_info(self) -> List[Dict]:
-        """阪急電車の運行情報を取得（公式サイト）"""
-        url = "https://www.hankyu.co.jp/railinfo/include/page_railinfo.html"
+        display が false の路線は、影響線区をチェックするためだけに使う（結果には含めない）。
+        事象（div.jisyo）ごとの抽出結果はフィンガープリントでキャッシュし、
+        前回から変化した事象だけを抽出し直す。
+        """
+        # 影響線区の登録先となる対象路線
+        target_lines = [line for line in lines if line['display']]
+        page_key = tuple((line['company'], line['line']) for line in lines)
+        cache = self._jr_incident_cache.get(page_key, {})
+        next_cache = {}
+        found_lines = {}
         
-        try:
-            soup = self._fetch_with_retry(url)
-            if not soup:
-                raise Exception("ページ取得失敗")
-            
-            # 運行情報のリストを取得
-            line_items = soup.select('.sec02_inner_cnt > ul > li')
+        # 運行情報一覧を取得（HTMLの構造に合わせて修正）
+        # 方法1: ul.page_downを探す（従来の方法）
+        info_list = soup.find('ul', class_='page_down')
+        if not info_list:
+            # 方法2: すべてのulタグからli > aを含むものを探す
+            all_uls = soup.find_all('ul')
+            for ul in all_uls:
+                if ul.find('li') and ul.find('a'):
+                    info_list = ul
+                    break
+        
+        if info_list:
+            # 詳細情報のアンカーを一度に索引化（事象ごとにページ全体を検索しない）
+            anchors = {}
+            for anchor in soup.find_all('a', attrs={'name': True}):
+                anchors.setdefault(anchor['name'], anchor)
             
-            for item in line_items:
-                line_div = item.select_one('.sec02_inner_cnt_line')
-                if not line_div:
-                    continue
-                
-                # 路線名を取得
-                line_name_elem = line_div.select_one('h3 span')
-                if not line_name_elem:
+            items = info_list.find_all('li')
+            for item in items:
+                link = item.find('a')
+                if not link:
                     continue
                 
-                line_name = line_name_elem.get_text(strip=True)
+                text = link.get_text()
+                link_id = link.get('href', '').replace('#', '')
                 
-                # 京都線のみを処理
-                if '京都線' not in line_name:
+                # 全チェック対象路線かチェック（表示対象 + 影響線区チェック用）
+                line = next((line for line in lines if any(pattern in text for pattern in line['patterns'])), None)
+                if line is None:
                     continue
                 
-                # 運行状況を取得
-                status_elem = line_div.select_one('p')
-                if not status_elem:
+                # 詳細情報を取得
+                detail_anchor = anchors.get(link_id)
+                if not detail_anchor:
+                    continue
+                parent_div = detail_anchor.find_parent('div', class_='jisyo')
+                if not parent_div:
                     continue
                 
-                status_text = status_elem.get_text(strip=True)
+                # 抽出に使う文字列だけを取り出す（解析木はシリアライズしない）
+                detail_text = parent_div.get_text()
+                gaiyo = parent_div.find('p', class_='gaiyo')
+                gaiyo_text = gaiyo.get_text() if gaiyo else None
+                line_texts = [span.get_text() for span in parent_div.find_all('span', class_='line')]
                 
-                # ステータスとアイコンから状態を判定
-                delay_minutes = 0
-                details = ''
+                # 抽出に使う文字列が変化していない事象は前回の抽出結果を再利用
+                fingerprint = hashlib.sha1(
+                    '\0'.join([text, detail_text, gaiyo_text or '', '\0'.join(line_texts)]).encode('utf-8')
+                ).hexdigest()
+                incident = cache.get(fingerprint)
+                if incident is None:
+                    incident = self._extract_jr_west_incident(text, detail_text, gaiyo_text, line_texts, target_lines)
+                next_cache[fingerprint] = incident
                 
-                if 'icon_railinfo_01' in str(status_elem) or '平常運転' in status_text:
-                    status = '平常運転'
-                elif 'icon_railinfo_02' in str(status_elem) or '運転見合わせ' in status_text:
-                    status = '運転見合わせ'
-                    details = status_text
-                elif 'icon_railinfo_03' in str(status_elem) or '遅延' in status_text:
-                    status = '遅延あり'
-                    delay_minutes = 20  # 阪急は20分以上の遅延で表示
-                    details = status_text
-                else:
-                    status = '平常運転' if '平常' in status_text else status_text
+                status = incident['status']
+                delay_minutes = incident['delay_minutes']
+                details = incident['details']
                 
-                # 運転再開見込み時刻を抽出
-                if details:
-                    resume_time = self._extract_resume_time(details)
-                    if resume_time:
-                        details = f"【再開見込み: {resume_time}】 {details}"
+                # 対象路線のみ登録（大阪環状線等のチェック用路線は除外）
+                if line['display']:
+                    found_lines[(line['company'], line['line'])] = self._line_result(
+                        line, status, delay_minutes, details
+                    )
                 
-                return [{
-                    'company': '阪急電車',
-                    'line': '京都線',
-                    'status': status,
-                    'delay_minutes': delay_minutes,
-                    'details': details,
-                    'updated_at': datetime.now().isoformat()
-                }]
-            
-            # 京都線が見つからない場合（平常運転扱い）
-            return [{
-                'company': '阪急電車',
-                'line': '京都線',
-                'status': '平常運転',
-                'delay_minutes': 0,
-                'details': '',
-                'updated_at': datetime.now().isoformat()
-            }]
-            
-        except Exception as e:
-            print(f"阪急電車の情報取得エラー: {e}")
-            return [{
-                'company': '阪急電車',
-                'line': '京都線',
-                'status': '情報取得エラー',
-                'delay_minutes': 0,
-                'details': '現在、情報を取得できません',
-                'updated_at': datetime.now().isoformat()
-            }]
+                # 【重要】影響線区の対象路線にも情報を設定（同じ詳細情報を使用）
+                for check_line in incident['affected']:
+                    check_key = (check_line['company'], check_line['line'])
+                    if check_key not in found_lines:  # まだ登録されていない路線
+                        found_lines[check_key] = self._line_result(
+                            check_line, status, delay_minutes, details
+                        )
+        
+        # 今回のページに存在する事象だけを残す（終了した事象はキャッシュから削除）
+        self._jr_incident_cache[page_key] = next_cache
+        return found_lines
+
+    def _extract_jr_west_incident(self, text: str, detail_text: str, gaiyo_text: Optional[str],
+                                  line_texts: List[str], target_lines: List[Dict]) -> Dict:
+        """JR西日本の事象1件（div.jisyo）から運行状況と影響線区を抽出
 
-    def get_kyoto_subway_info(self) -> List[Dict]:
-        """京都市営地下鉄の運行情報を取得（Yahoo!路線情報）"""
-        results = []
+        text は一覧のリンク文字列、detail_text は div.jisyo 全体の文字列、
+        gaiyo_text は p.gaiyo の文字列、line_texts は span.line の文字列の一覧。
+        """
+        # 運転見合わせの検出
+        if '運転見合わせ' in text or '運転見合わせ' in detail_text:
+            status = '運転見合わせ'
+            delay_minutes = 0
+        elif '遅延' in text or '遅れ' in detail_text:
+            status = '遅延あり'
+            delay_match = re.search(r'(\d+)分', detail_text)
+            delay_minutes = int(delay_match.group(1)) if delay_match else 20
+        else:
+            status = '遅延あり'
+            delay_minutes = 20
         
-        # 烏丸線
-        karasuma = self._get_yahoo_line_info('341', '烏丸線', '京都市営地下鉄')
-        results.append(karasuma)
+        # 詳細情報を抽出
+        if gaiyo_text is not None:
+            details = gaiyo_text.strip().replace('\n', ' ').replace('\r', '')[:300]
+        else:
+            details = text
         
-        # 東西線
-        tozai = self._get_yahoo_line_info('342', '東西線', '京都市営地下鉄')
-        results.append(tozai)
+        # 運転再開見込み時刻を抽出
+        resume_time = self._extract_resume_time(detail_text)
+        if resume_time:
+            details = f"【再開見込み: {resume_time}】 {details}"
         
-        return results
-
-    def get_all_train_info(self) -> Dict:
-        """すべての鉄道会社の運行情報を並列取得（高速化）"""
-        # 並列処理で全路線を同時取得
-        with ThreadPoolExecutor(max_workers=6) as executor:
-            # 各社の取得タスクを登録
-            futures = {
-                executor.submit(self.get_jr_west_info): 'JR西日本',
-                executor.submit(self.get_keihan_info): '京阪電車',
-                executor.submit(self.get_hankyu_info): '阪急電車',
-                executor.submit(self.get_kintetsu_info): '近畿日本鉄道',
-                executor.submit(self.get_kyoto_subway_info): '京都市営地下鉄',
-            }
-            
-            # 完了した順に結果を一時保存
-            temp_data = {}
-            for future in as_completed(futures):
-                company = futures[future]
-                try:
-                    result = future.result()
-                    temp_data[company] = result
-                except Exception as e:
-                    print(f"{company}の情報取得エラー: {e}")
-                    temp_data[company] = []
+        # 影響線区は <span class='line'> に記載されている（記載順に対象路線を列挙）
+        affected = []
+        for line_text in line_texts:
+            for check_line in target_lines:
+                if check_line not in affected and any(pattern in line_text for pattern in check_line['patterns']):
+                    affected.append(check_line)
         
-        # 指定された順番で路線を並び替え
-        ordered_info = []
+        return {
+            'status': status,
+            'delay_minutes': delay_minutes,
+            'details': details,
+            'affected': affected
+        }
+
+    def _extract_hankyu(self, soup: BeautifulSoup, lines: List[Dict]) -> Dict[LineKey, Dict]:
+        """阪急電車の公式サイトから抽出"""
+        found = {}
         
-        # 1-6. JR西日本（指定順）
-        jr_lines_order = ['奈良線', '京都線', '琵琶湖線', '湖西線', '嵯峨野線', '学研都市線']
-        if 'JR西日本' in temp_data:
-            jr_data = {item['line']: item for item in temp_data['JR西日本']}
-            for line in jr_lines_order:
-                if line in jr_data:
-                    ordered_info.append(jr_data[line])
+        # 運行情報のリストを取得
+        line_items = soup.select('.sec02_inner_cnt > ul > li')
         
-        # 6. 京阪電車 本線
-        if '京阪電車' in temp_data:
-            ordered_info.extend(temp_data['京阪電車'])
+        for item in line_items:
+            line_div = item.select_one('.sec02_inner_cnt_line')
+            if not line_div:
+                continue
+            
+            # 路線名を取得
+            line_name_elem = line_div.select_one('h3 span')
+            if not line_name_elem:
+                continue
+            
+            line_name = line_name_elem.get_text(strip=True)
+            
+            # 対象路線を探す（先に見つかったものを優先）
+            matched = [
+                line for line in lines
+                if line['display'] and (line['company'], line['line']) not in found
+                and any(pattern in line_name for pattern in line['patterns'])
+            ]
+            if not matched:
+                continue
+            
+            # 運行状況を取得
+            status_elem = line_div.select_one('p')
+            if not status_elem:
+                continue
+            
+            status_text = status_elem.get_text(strip=True)
+            
+            # ステータスとアイコンから状態を判定
+            delay_minutes = 0
+            details = ''
+            
+            if 'icon_railinfo_01' in str(status_elem) or '平常運転' in status_text:
+                status = '平常運転'
+            elif 'icon_railinfo_02' in str(status_elem) or '運転見合わせ' in status_text:
+                status = '運転見合わせ'
+                details = status_text
+            elif 'icon_railinfo_03' in str(status_elem) or '遅延' in status_text:
+                status = '遅延あり'
+                delay_minutes = 20  # 阪急は20分以上の遅延で表示
+                details = status_text
+            else:
+                status = '平常運転' if '平常' in status_text else status_text
+            
+            # 運転再開見込み時刻を抽出
+            if details:
+                resume_time = self._extract_resume_time(details)
+                if resume_time:
+                    details = f"【再開見込み: {resume_time}】 {details}"
+            
+            for line in matched:
+                found[(line['company'], line['line'])] = self._line_result(line, status, delay_minutes, details)
         
-        # 7. 阪急電車 京都線
-        if '阪急電車' in temp_data:
-            ordered_info.extend(temp_data['阪急電車'])
+        return found
+
+    def get_all_train_info(self) -> Dict:
+        """登録されたすべての路線の運行情報を取得
+
+        ページ単位でまとめて取得し、ホストごとのアクセス制限内で並列に実行する。
+        """
+        pages = self.registry.pages()
         
-        # 8. 京都市営地下鉄 烏丸線
-        if '京都市営地下鉄' in temp_data:
-            subway_data = {item['line']: item for item in temp_data['京都市営地下鉄']}
-            if '烏丸線' in subway_data:
-                ordered_info.append(subway_data['烏丸線'])
+        refresh = self.memory.begin_refresh()
+        try:
+            page_results = self.scheduler.run(pages, lambda page: self._get_page_info(page, refresh))
+        finally:
+            # decompose後に循環参照で残る解析木の断片を、次の更新を待たずに回収
+            gc.collect()
+            self.memory.end_refresh(refresh)
         
-        # 9. 近畿日本鉄道 京都線
-        if '近畿日本鉄道' in temp_data:
-            ordered_info.extend(temp_data['近畿日本鉄道'])
+        found = {}
+        for page, result in zip(pages, page_results):
+            found.update(result if result is not None else self._error_results(page))
         
-        # 10. 京都市営地下鉄 東西線
-        if '京都市営地下鉄' in temp_data:
-            subway_data = {item['line']: item for item in temp_data['京都市営地下鉄']}
-            if '東西線' in subway_data:
-                ordered_info.append(subway_data['東西線'])
+        # 登録順（表示順）に並べる
+        ordered_info = [found[(line['company'], line['line'])] for line in self.registry.display_lines]
         
         return {
             'status': 'success',